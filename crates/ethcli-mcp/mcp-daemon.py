@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Long-lived ethcli-mcp server for repeated test_mcp.py runs.
+
+Spawns one ethcli-mcp process and serves it over a Unix socket, so consecutive
+test runs skip server startup, config parsing and endpoint warmup:
+
+    python3 crates/ethcli-mcp/mcp-daemon.py &
+    ETHCLI_MCP_SOCK=/tmp/ethcli-mcp.sock python3 crates/ethcli-mcp/test_mcp.py
+
+The daemon owns the MCP session with the server. Its handshake result is
+written to <socket>.session along with the daemon's pid and the socket's inode,
+so warm clients check the file locally and skip initialize with no round-trip.
+A client's initialize is answered from the same cached result. tools/batchCall
+runs a group of tool calls in one round-trip (see run_tool_dag). Each connection
+keeps its own request ids. Clients may use ndjson or length-prefixed framing; it
+is detected from the first line they send.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+
+from test_mcp import MCPClient, _dumps, _loads, run_tool_dag, session_path
+
+SOCK_PATH = os.environ.get("ETHCLI_MCP_SOCK", "/tmp/ethcli-mcp.sock")
+
+# StreamReader line limit for client requests
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class Daemon:
+    def __init__(self):
+        self.upstream = MCPClient(framing="ndjson", socket_path=None)
+
+    async def start(self) -> bool:
+        await self.upstream.start()
+        return await self.upstream.initialize()
+
+    async def stop(self):
+        await self.upstream.stop()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        try:
+            line = await reader.readline()
+            framing = "length" if line.startswith(b"$") else "ndjson"
+            while line:
+                payload = await reader.readexactly(int(line[1:])) if framing == "length" else line
+                if payload.strip():
+                    # Dispatch concurrently so a client's pipelined requests stay pipelined
+                    task = asyncio.create_task(self.dispatch(payload, writer, framing))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                line = await reader.readline()
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def dispatch(self, payload: bytes, writer: asyncio.StreamWriter, framing: str):
+        try:
+            message = _loads(payload)
+        except ValueError:
+            return
+        # The daemon owns the server session, so client notifications are not forwarded
+        if not isinstance(message, dict) or "id" not in message:
+            return
+
+        method = message.get("method")
+        params = message.get("params")
+        if method == "initialize":
+            resp = {"result": self.upstream.init_result}
+        elif method == "tools/batchCall" and isinstance(params, dict) and isinstance(params.get("calls"), list):
+            raws = await run_tool_dag(params["calls"], self.upstream.call_bodies_raw)
+            resp = {"result": {"results": [batch_item(raw) for raw in raws]}}
+        elif method == "tools/call" and isinstance(params, dict):
+            resp = await self.upstream.call_tool(params.get("name"), params.get("arguments") or {})
+        else:
+            resp = await self.upstream.send_request(method, params)
+
+        reply = {"jsonrpc": "2.0", "id": message["id"]}
+        if "result" in resp:
+            reply["result"] = resp["result"]
+        else:
+            error = resp.get("error")
+            reply["error"] = error if isinstance(error, dict) else {"code": -32603, "message": str(error)}
+
+        data = _dumps(reply)
+        try:
+            writer.write(b"$%d\n" % len(data) + data if framing == "length" else data + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def batch_item(raw: bytes) -> dict:
+    # One tools/batchCall entry: the call's result or error without the JSON-RPC envelope
+    try:
+        resp = _loads(raw)
+    except ValueError:
+        return {"error": {"code": -32700, "message": "Invalid JSON response"}}
+    if "result" in resp:
+        return {"result": resp["result"]}
+    return {"error": resp.get("error")}
+
+
+def write_session(path: str, session: dict):
+    # Replace atomically so a client never reads a half-written file
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(_dumps(session))
+    os.replace(tmp, path)
+
+
+async def serve(socket_path: str) -> int:
+    daemon = Daemon()
+    if not await daemon.start():
+        print("Failed to initialize MCP connection", file=sys.stderr)
+        await daemon.stop()
+        return 1
+
+    session_file = session_path(socket_path)
+    for path in (socket_path, session_file):
+        if os.path.exists(path):
+            os.unlink(path)
+    server = await asyncio.start_unix_server(daemon.handle_client, path=socket_path, limit=STREAM_LIMIT)
+    os.chmod(socket_path, 0o600)
+    session = {"pid": os.getpid(), "inode": os.stat(socket_path).st_ino, "result": daemon.upstream.init_result}
+    write_session(session_file, session)
+
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    print(f"ethcli-mcp daemon listening on {socket_path}")
+    try:
+        # Exit on a signal, or when the server process itself goes away
+        waiters = [asyncio.create_task(stopped.wait()), asyncio.create_task(daemon.upstream.proc.wait())]
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+    finally:
+        server.close()
+        for path in (socket_path, session_file):
+            if os.path.exists(path):
+                os.unlink(path)
+        await daemon.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(serve(SOCK_PATH)))
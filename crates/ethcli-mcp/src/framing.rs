@@ -0,0 +1,251 @@
+//! Wire framing for the STDIO transport
+//!
+//! rmcp speaks newline-delimited JSON. With `--framing=length`, every message on
+//! stdin/stdout is instead prefixed with an ASCII `$<len>\n` header, so readers can
+//! jump straight to the next message boundary instead of scanning for newlines.
+//! The length-prefixed streams are bridged to rmcp through an in-memory pipe.
+
+use tokio::io::{
+    AsyncBufReadExt, AsyncRead, AsyncReadExt, AsyncWrite, AsyncWriteExt, BufReader, DuplexStream,
+    ReadHalf, WriteHalf,
+};
+
+/// Maximum accepted frame size (64 MiB)
+const MAX_FRAME_LEN: usize = 64 * 1024 * 1024;
+
+/// Capacity of the in-memory pipe between the framing bridge and rmcp
+const BRIDGE_BUFFER: usize = 64 * 1024;
+
+/// Message framing on stdin/stdout
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub enum Framing {
+    /// Newline-delimited JSON (MCP default)
+    #[default]
+    NdJson,
+    /// `$<len>\n` header followed by `<len>` payload bytes
+    Length,
+}
+
+impl Framing {
+    /// Parse `--framing=<ndjson|length>` or `--framing <ndjson|length>` from command-line
+    /// arguments. Any other argument is rejected, so a misspelled flag can't silently
+    /// leave the server on the default wire format.
+    pub fn from_args<I, S>(args: I) -> anyhow::Result<Self>
+    where
+        I: IntoIterator<Item = S>,
+        S: AsRef<str>,
+    {
+        let mut framing = Self::default();
+        let mut args = args.into_iter();
+        while let Some(arg) = args.next() {
+            let arg = arg.as_ref();
+            let value = match arg.strip_prefix("--framing=") {
+                Some(value) => value.to_string(),
+                None if arg == "--framing" => match args.next() {
+                    Some(value) => value.as_ref().to_string(),
+                    None => {
+                        anyhow::bail!("Missing value for --framing (expected 'ndjson' or 'length')")
+                    }
+                },
+                None => anyhow::bail!(
+                    "Unknown argument '{}' (usage: ethcli-mcp [--framing <ndjson|length>])",
+                    arg
+                ),
+            };
+            framing = match value.as_str() {
+                "ndjson" => Self::NdJson,
+                "length" => Self::Length,
+                other => anyhow::bail!(
+                    "Unknown framing '{}' (expected 'ndjson' or 'length')",
+                    other
+                ),
+            };
+        }
+        Ok(framing)
+    }
+}
+
+/// Bridge length-prefixed `input`/`output` to a newline-delimited transport for rmcp
+pub fn bridge<R, W>(input: R, output: W) -> (ReadHalf<DuplexStream>, WriteHalf<DuplexStream>)
+where
+    R: AsyncRead + Unpin + Send + 'static,
+    W: AsyncWrite + Unpin + Send + 'static,
+{
+    let (server_side, bridge_side) = tokio::io::duplex(BRIDGE_BUFFER);
+    let (bridge_read, mut bridge_write) = tokio::io::split(bridge_side);
+
+    tokio::spawn(async move {
+        if let Err(e) = unframe(input, &mut bridge_write).await {
+            tracing::warn!(error = %e, "Length-framed input failed");
+        }
+        // Signal EOF to rmcp so the service shuts down with its input
+        let _ = bridge_write.shutdown().await;
+    });
+    tokio::spawn(async move {
+        if let Err(e) = frame(bridge_read, output).await {
+            tracing::warn!(error = %e, "Length-framed output failed");
+        }
+    });
+
+    tokio::io::split(server_side)
+}
+
+/// Parse a `$<len>` frame header (trailing newline already removed)
+fn parse_header(header: &[u8]) -> std::io::Result<usize> {
+    let header = header.strip_suffix(b"\r").unwrap_or(header);
+    let len = header
+        .strip_prefix(b"$")
+        .and_then(|digits| std::str::from_utf8(digits).ok())
+        .and_then(|digits| digits.parse::<usize>().ok())
+        .ok_or_else(|| {
+            invalid_data(format!(
+                "Invalid frame header: {:?}",
+                String::from_utf8_lossy(header)
+            ))
+        })?;
+
+    if len > MAX_FRAME_LEN {
+        return Err(invalid_data(format!(
+            "Frame too large: {} bytes (max {})",
+            len, MAX_FRAME_LEN
+        )));
+    }
+    Ok(len)
+}
+
+fn invalid_data(message: String) -> std::io::Error {
+    std::io::Error::new(std::io::ErrorKind::InvalidData, message)
+}
+
+/// Copy length-prefixed frames from `input` to newline-delimited messages on `output`
+async fn unframe<R, W>(input: R, output: &mut W) -> std::io::Result<()>
+where
+    R: AsyncRead + Unpin,
+    W: AsyncWrite + Unpin,
+{
+    let mut input = BufReader::new(input);
+    let mut header = Vec::new();
+    let mut payload = Vec::new();
+
+    loop {
+        header.clear();
+        if input.read_until(b'\n', &mut header).await? == 0 {
+            return Ok(());
+        }
+        let header = header.strip_suffix(b"\n").unwrap_or(&header);
+        if header.is_empty() {
+            continue;
+        }
+
+        payload.resize(parse_header(header)?, 0);
+        input.read_exact(&mut payload).await?;
+        // Raw newlines can only be insignificant whitespace in valid JSON
+        for byte in payload.iter_mut().filter(|b| **b == b'\n') {
+            *byte = b' ';
+        }
+        payload.push(b'\n');
+        output.write_all(&payload).await?;
+        output.flush().await?;
+    }
+}
+
+/// Copy newline-delimited messages from `input` to length-prefixed frames on `output`
+async fn frame<R, W>(input: R, mut output: W) -> std::io::Result<()>
+where
+    R: AsyncRead + Unpin,
+    W: AsyncWrite + Unpin,
+{
+    let mut input = BufReader::new(input);
+    let mut line = Vec::new();
+
+    loop {
+        line.clear();
+        if input.read_until(b'\n', &mut line).await? == 0 {
+            return output.flush().await;
+        }
+        let payload = line.strip_suffix(b"\n").unwrap_or(&line);
+        if payload.is_empty() {
+            continue;
+        }
+
+        output
+            .write_all(format!("${}\n", payload.len()).as_bytes())
+            .await?;
+        output.write_all(payload).await?;
+        // Flush per message so the client never waits on a partially filled buffer
+        output.flush().await?;
+    }
+}
+
+// =============================================================================
+// UNIT TESTS
+// =============================================================================
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_framing_from_args() {
+        assert_eq!(
+            Framing::from_args(Vec::<String>::new()).unwrap(),
+            Framing::NdJson
+        );
+        assert_eq!(
+            Framing::from_args(["--framing=length"]).unwrap(),
+            Framing::Length
+        );
+        assert_eq!(
+            Framing::from_args(["--framing=ndjson"]).unwrap(),
+            Framing::NdJson
+        );
+        assert_eq!(
+            Framing::from_args(["--framing", "length"]).unwrap(),
+            Framing::Length
+        );
+        assert!(Framing::from_args(["--framing=xml"]).is_err());
+        assert!(Framing::from_args(["--framing"]).is_err());
+        assert!(Framing::from_args(["--framming=length"]).is_err());
+        assert!(Framing::from_args(["length"]).is_err());
+    }
+
+    #[test]
+    fn test_parse_header() {
+        assert_eq!(parse_header(b"$0").unwrap(), 0);
+        assert_eq!(parse_header(b"$1234").unwrap(), 1234);
+        assert_eq!(parse_header(b"$42\r").unwrap(), 42);
+    }
+
+    #[test]
+    fn test_parse_header_invalid() {
+        assert!(parse_header(b"").is_err());
+        assert!(parse_header(b"42").is_err());
+        assert!(parse_header(b"$").is_err());
+        assert!(parse_header(b"$-1").is_err());
+        assert!(parse_header(b"$abc").is_err());
+        assert!(parse_header(format!("${}", MAX_FRAME_LEN + 1).as_bytes()).is_err());
+    }
+
+    #[tokio::test]
+    async fn test_unframe() {
+        let input: &[u8] = b"$7\n{\"a\":1}$10\n{\"b\":\n[2]}";
+        let mut output = Vec::new();
+        unframe(input, &mut output).await.unwrap();
+        assert_eq!(output, b"{\"a\":1}\n{\"b\": [2]}\n");
+    }
+
+    #[tokio::test]
+    async fn test_unframe_truncated() {
+        let input: &[u8] = b"$10\n{\"a\":1}";
+        let mut output = Vec::new();
+        assert!(unframe(input, &mut output).await.is_err());
+    }
+
+    #[tokio::test]
+    async fn test_frame() {
+        let input: &[u8] = b"{\"a\":1}\n\n{\"b\":[2]}\n";
+        let mut output = Vec::new();
+        frame(input, &mut output).await.unwrap();
+        assert_eq!(output, b"$7\n{\"a\":1}$9\n{\"b\":[2]}");
+    }
+}
@@ -13,6 +13,7 @@
 #![deny(clippy::dbg_macro)]
 
 mod executor;
+mod framing;
 mod tools;
 mod types;
 
@@ -2043,6 +2044,9 @@ async fn verify_ethcli() -> anyhow::Result<String> {
 
 #[tokio::main]
 async fn main() -> anyhow::Result<()> {
+    // Parse arguments first so a bad flag fails before any setup work
+    let framing = framing::Framing::from_args(std::env::args().skip(1))?;
+
     // Initialize logging to stderr (NEVER stdout!)
     tracing_subscriber::registry()
         .with(
@@ -2071,7 +2075,17 @@ async fn main() -> anyhow::Result<()> {
 
     // Create server and run with STDIO transport
     let server = EthcliMcpServer::new();
-    let service = server.serve(stdio()).await?;
+    // Both transports flush stdout after every message, so clients never wait on a
+    // partially filled buffer for a response
+    let service = match framing {
+        framing::Framing::NdJson => server.serve(stdio()).await?,
+        framing::Framing::Length => {
+            tracing::info!("Using length-prefixed framing");
+            server
+                .serve(framing::bridge(tokio::io::stdin(), tokio::io::stdout()))
+                .await?
+        }
+    };
 
     tracing::info!(tools = 236, "ethcli-mcp server ready");
 